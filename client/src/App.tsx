@@ -45,6 +45,10 @@ interface AISuggestion {
   replaceTo?: string;     // 新增：建议替换的文本
 }
 
+// 建议的唯一标识（原文 + 替换文本），用于识别流式分析过程中已被处理的建议
+const suggestionKey = (suggestion: AISuggestion) =>
+  `${suggestion.originalText ?? suggestion.text}\u0000${suggestion.replaceTo ?? suggestion.suggestion}`;
+
 interface AppState {
   currentDocument: DocumentWithCurrentVersion | null;
   documentVersions: DocumentVersion[];
@@ -111,6 +115,10 @@ function App() {
   
   // TipTap编辑器实例引用
   const editorRef = useRef<any>(null);
+  
+  // AI建议是否仍在流式接收中，以及期间已被接受/忽略的建议
+  const suggestionsStreamingRef = useRef(false);
+  const handledSuggestionKeysRef = useRef<Set<string>>(new Set());
 
   /**
    * 处理文档内容变化
@@ -320,6 +328,13 @@ function App() {
    */
   const handleAISuggestions = useCallback((suggestions: AISuggestion[]) => {
     console.log("🎯 更新AI建议:", suggestions.length, "个建议");
+    // 最终结果中去掉流式接收期间已被接受/忽略的建议，避免它们重新出现
+    const handled = handledSuggestionKeysRef.current;
+    if (handled.size > 0) {
+      suggestions = suggestions.filter(suggestion => !handled.has(suggestionKey(suggestion)));
+    }
+    handled.clear();
+    suggestionsStreamingRef.current = false;
     setAppState(prev => {
       // 防止重复设置相同的建议
       if (JSON.stringify(prev.aiSuggestions) === JSON.stringify(suggestions)) {
@@ -334,6 +349,22 @@ function App() {
     });
   }, []);
 
+  /**
+   * 处理增量AI建议回调
+   * Handle a single streamed AI suggestion
+   */
+  const handleAISuggestionPartial = useCallback((suggestion: AISuggestion, isFirst: boolean) => {
+    // 新一轮分析的第一条建议替换旧建议，之后的建议追加到当前列表（保留用户期间的接受/忽略操作）
+    if (isFirst) {
+      handledSuggestionKeysRef.current.clear();
+    }
+    suggestionsStreamingRef.current = true;
+    setAppState(prev => ({
+      ...prev,
+      aiSuggestions: isFirst ? [suggestion] : [...prev.aiSuggestions, suggestion]
+    }));
+  }, []);
+
   /**
    * 处理AI处理状态回调
    * Handle AI processing status updates
@@ -589,6 +620,9 @@ function App() {
     }
     
     // 从建议列表中移除
+    if (suggestionsStreamingRef.current) {
+      handledSuggestionKeysRef.current.add(suggestionKey(suggestion));
+    }
     setAppState(prev => ({
       ...prev,
       aiSuggestions: prev.aiSuggestions.filter((_, i) => i !== index)
@@ -615,10 +649,16 @@ function App() {
    */
   const closeSuggestion = useCallback((index: number) => {
     console.log('❌ 关闭建议:', index);
-    setAppState(prev => ({
-      ...prev,
-      aiSuggestions: prev.aiSuggestions.filter((_, i) => i !== index)
-    }));
+    setAppState(prev => {
+      const suggestion = prev.aiSuggestions[index];
+      if (suggestion && suggestionsStreamingRef.current) {
+        handledSuggestionKeysRef.current.add(suggestionKey(suggestion));
+      }
+      return {
+        ...prev,
+        aiSuggestions: prev.aiSuggestions.filter((_, i) => i !== index)
+      };
+    });
   }, []);
 
   return (
@@ -833,6 +873,7 @@ function App() {
                   onContentChange={handleContentChange}
                   content={currentDocumentContent}
                   onAISuggestions={handleAISuggestions}
+                  onAISuggestionPartial={handleAISuggestionPartial}
                   onProcessingStatus={handleAIProcessingStatus}
                   onManualAnalysis={registerManualAnalysis}
                   onEditorReady={handleEditorReady}
@@ -1,5 +1,4 @@
 import { useState, useRef, useEffect } from "react";
-import axios from "axios";
 import ReactMarkdown from "react-markdown";
 import mermaid from "mermaid";
 
@@ -58,23 +57,79 @@ export default function ChatPanel({ className }: ChatPanelProps) {
     setInputMessage("");
     setIsLoading(true);
 
+    // 是否已创建本轮的AI响应消息（出错时需要替换它而不是再追加一条）
+    let assistantStarted = false;
+
     try {
       // 构建消息历史
       const messageHistory = [...messages, userMessage];
       
-      // 调用API
-      const response = await axios.post("http://localhost:8000/api/chat", {
-        messages: messageHistory.map(({ role, content }) => ({ role, content }))
+      // 调用API（Server-Sent Events流式响应）
+      const response = await fetch("http://localhost:8000/api/chat", {
+        method: "POST",
+        headers: { "Content-Type": "application/json" },
+        body: JSON.stringify({
+          messages: messageHistory.map(({ role, content }) => ({ role, content }))
+        })
       });
+      if (!response.ok || !response.body) {
+        throw new Error(`聊天请求失败: ${response.status}`);
+      }
 
-      // 添加AI响应
-      const assistantMessage: ChatMessage = {
-        role: "assistant",
-        content: response.data.response,
-        timestamp: new Date()
+      // 收到第一段内容时才创建AI响应，之后逐段追加；等待期间继续显示加载动画
+      const appendToAssistant = (text: string) => {
+        if (!assistantStarted) {
+          assistantStarted = true;
+          setMessages(prev => [...prev, { role: "assistant", content: text, timestamp: new Date() }]);
+          return;
+        }
+        setMessages(prev => {
+          const last = prev[prev.length - 1];
+          return [...prev.slice(0, -1), { ...last, content: last.content + text }];
+        });
       };
 
-      setMessages(prev => [...prev, assistantMessage]);
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let finished = false;
+      
+      while (!finished) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        
+        // SSE事件以空行分隔
+        let separator: number;
+        while ((separator = buffer.indexOf("\n\n")) !== -1) {
+          const rawEvent = buffer.slice(0, separator);
+          buffer = buffer.slice(separator + 2);
+          
+          let eventName = "message";
+          let data = "";
+          for (const line of rawEvent.split("\n")) {
+            if (line.startsWith("event: ")) eventName = line.slice(7);
+            else if (line.startsWith("data: ")) data += line.slice(6);
+          }
+          
+          switch (eventName) {
+            case "message":
+            case "diagram":
+              // diagram事件内容是完整的mermaid代码块，直接追加即可由Markdown渲染
+              appendToAssistant(JSON.parse(data));
+              break;
+            case "error":
+              throw new Error(JSON.parse(data));
+            case "done":
+              finished = true;
+              break;
+          }
+        }
+      }
+      // 没有收到done事件就断开，说明响应不完整
+      if (!finished) {
+        throw new Error("聊天响应意外中断");
+      }
     } catch (error) {
       console.error("聊天错误:", error);
       
@@ -85,7 +140,8 @@ export default function ChatPanel({ className }: ChatPanelProps) {
         timestamp: new Date()
       };
       
-      setMessages(prev => [...prev, errorMessage]);
+      // 用错误消息替换不完整的AI响应，避免它作为历史记录被发回服务端
+      setMessages(prev => assistantStarted ? [...prev.slice(0, -1), errorMessage] : [...prev, errorMessage]);
     } finally {
       setIsLoading(false);
     }
@@ -174,7 +230,8 @@ export default function ChatPanel({ className }: ChatPanelProps) {
           ))
         )}
         
-        {isLoading && (
+        {/* AI响应开始流式输出后就不再显示加载动画 */}
+        {isLoading && messages[messages.length - 1]?.role === "user" && (
           <div className="mr-auto max-w-[80%]">
             <div className="bg-gray-100 rounded-lg px-4 py-2">
               <div className="flex items-center space-x-2">
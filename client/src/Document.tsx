@@ -19,9 +19,9 @@ interface AIResponse {
 }
 
 interface WebSocketMessage {
-  type: 'ai_suggestions' | 'processing_start' | 'validation_error' | 'ai_error' | 'server_error' | 'status' | 'connection_success';
+  type: 'ai_suggestions' | 'ai_suggestion_partial' | 'processing_start' | 'validation_error' | 'ai_error' | 'server_error' | 'status' | 'connection_success';
   message?: string;
-  data?: AIResponse;
+  data?: AIResponse | AISuggestion;  // ai_suggestion_partial 时为单条建议
   timestamp?: string;
   details?: string;
 }
@@ -30,6 +30,7 @@ export interface DocumentProps {
   onContentChange: (content: string) => void;
   content: string;
   onAISuggestions?: (suggestions: AISuggestion[]) => void;  // AI建议回调
+  onAISuggestionPartial?: (suggestion: AISuggestion, isFirst: boolean) => void;  // 增量AI建议回调（isFirst表示本轮第一条）
   onProcessingStatus?: (isProcessing: boolean, message?: string) => void;  // 处理状态回调
   onManualAnalysis?: (analysisFunction: () => void) => void;  // 注册手动分析函数的回调
   onEditorReady?: (editor: any) => void;  // 新增：编辑器实例回调
@@ -44,6 +45,7 @@ export default function Document({
   onContentChange, 
   content, 
   onAISuggestions,
+  onAISuggestionPartial,
   onProcessingStatus,
   onManualAnalysis,
   onEditorReady
@@ -54,6 +56,9 @@ export default function Document({
   
   // 添加编辑器实例引用
   const editorRef = useRef<any>(null);
+  
+  // 本轮分析中已增量收到的建议数量（ai_suggestion_partial）
+  const partialCountRef = useRef(0);
 
   const { sendMessage, lastMessage, readyState } = useWebSocket(SOCKET_URL, {
     onOpen: () => {
@@ -93,18 +98,31 @@ export default function Document({
         switch (message.type) {
           case 'processing_start':
             console.log("🤖 AI开始处理文档");
+            partialCountRef.current = 0;
             setIsAIProcessing(true);
             onProcessingStatus?.(true, message.message || "AI正在分析文档...");
             break;
             
-          case 'ai_suggestions':
+          case 'ai_suggestion_partial':
+            // 增量建议：每解析完一条就追加展示，无需等待整个分析结束
+            if (message.data) {
+              onAISuggestionPartial?.(message.data as AISuggestion, partialCountRef.current === 0);
+              partialCountRef.current += 1;
+              onProcessingStatus?.(true, `AI正在分析文档，已发现${partialCountRef.current}个建议...`);
+            }
+            break;
+            
+          case 'ai_suggestions': {
             console.log("✨ 收到AI建议:", message.data);
             setIsAIProcessing(false);
-            if (message.data?.issues) {
-              onAISuggestions?.(message.data.issues);
-              onProcessingStatus?.(false, `AI分析完成，发现${message.data.issues.length}个建议`);
+            partialCountRef.current = 0;
+            const result = message.data as AIResponse | undefined;
+            if (result?.issues) {
+              onAISuggestions?.(result.issues);
+              onProcessingStatus?.(false, `AI分析完成，发现${result.issues.length}个建议`);
             }
             break;
+          }
             
           case 'validation_error':
             console.warn("⚠️ 文档验证错误:", message.message);
@@ -11,7 +11,7 @@ from sqlalchemy.orm import Session
 from app.internal.ai import AI, get_ai
 from app.internal.data import DOCUMENT_1, DOCUMENT_2
 from app.internal.db import Base, SessionLocal, engine, get_db
-from app.internal.text_utils import html_to_plain_text, validate_text_for_ai, StreamingJSONParser
+from app.internal.text_utils import html_to_plain_text_async, validate_text_for_ai, StreamingJSONParser, shutdown_process_pool
 
 # 配置日志
 logging.basicConfig(level=logging.INFO)
@@ -88,6 +88,9 @@ async def lifespan(_: FastAPI):
             
             db.commit()
     yield
+    
+    # 关闭解析大文档用的进程池
+    shutdown_process_pool()
 
 
 app = FastAPI(lifespan=lifespan)
@@ -574,8 +577,8 @@ async def websocket_endpoint(websocket: WebSocket):
             html_content = await websocket.receive_text()
             logger.info(f"接收到HTML内容，长度: {len(html_content)}")
             
-            # 第一步：转换HTML为纯文本
-            plain_text = html_to_plain_text(html_content)
+            # 第一步：转换HTML为纯文本（在线程池/进程池中执行，不阻塞其他连接）
+            plain_text = await html_to_plain_text_async(html_content)
             
             # 第二步：验证文本是否适合AI处理
             is_valid, error_message = validate_text_for_ai(plain_text)
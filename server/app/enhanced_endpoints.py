@@ -1,15 +1,17 @@
 # Enhanced endpoints for the application
 
+import asyncio
 from datetime import datetime
-import json
 import logging
-from typing import List, Dict
+from typing import Any, AsyncGenerator, Dict, List
 
 from fastapi import WebSocket, WebSocketDisconnect, HTTPException
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
+import orjson
 
-from app.internal.ai_enhanced import get_ai_enhanced
-from app.internal.text_utils import html_to_plain_text, validate_text_for_ai
+from app.internal.ai_enhanced import get_ai_enhanced, get_review_batcher
+from app.internal.text_utils import html_to_plain_text_async, validate_text_for_ai
 
 logger = logging.getLogger(__name__)
 
@@ -23,6 +25,17 @@ class ChatRequest(BaseModel):
     messages: List[ChatMessage]
 
 
+async def _send(websocket: WebSocket, message: Dict[str, Any]) -> None:
+    """
+    用orjson序列化并发送一条WebSocket消息
+
+    orjson在C层完成编码，比标准库json快得多；仍然以文本帧发送，
+    前端直接JSON.parse(event.data)即可
+    """
+    payload = orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+    await websocket.send_text(payload.decode())
+
+
 async def websocket_enhanced_endpoint(websocket: WebSocket):
     """
     增强版WebSocket端点：支持Function Calling的AI建议系统
@@ -45,15 +58,15 @@ async def websocket_enhanced_endpoint(websocket: WebSocket):
             "message": "Enhanced AI服务已就绪",
             "timestamp": datetime.utcnow().isoformat()
         }
-        await websocket.send_text(json.dumps(success_msg))
+        await _send(websocket, success_msg)
     except ValueError as e:
-        logger.error(f"Enhanced AI服务初始化失败: {e}")
+        logger.error("Enhanced AI服务初始化失败: %s", e)
         error_msg = {
             "type": "ai_error",
             "message": f"AI服务初始化失败: {str(e)}",
             "timestamp": datetime.utcnow().isoformat()
         }
-        await websocket.send_text(json.dumps(error_msg))
+        await _send(websocket, error_msg)
         await websocket.close()
         return
     
@@ -61,90 +74,96 @@ async def websocket_enhanced_endpoint(websocket: WebSocket):
         while True:
             # 接收HTML内容
             html_content = await websocket.receive_text()
-            logger.info(f"收到HTML内容，长度: {len(html_content)}")
+            logger.info("收到HTML内容，长度: %d", len(html_content))
+            timestamp = datetime.utcnow().isoformat()  # 本轮所有消息共用同一时间戳
             
             # 通知前端开始处理
             processing_msg = {
                 "type": "processing_start",
                 "message": "正在分析文档...",
-                "timestamp": datetime.utcnow().isoformat()
+                "timestamp": timestamp
             }
-            await websocket.send_text(json.dumps(processing_msg))
             
             try:
-                # HTML转换为纯文本
-                plain_text = html_to_plain_text(html_content)
-                logger.info(f"转换后纯文本长度: {len(plain_text)}")
+                # HTML转换为纯文本（文档未变化时直接命中缓存）
+                # 解析在线程池/进程池中执行，与发送processing_start并发进行，不阻塞事件循环
+                _, plain_text = await asyncio.gather(
+                    _send(websocket, processing_msg),
+                    html_to_plain_text_async(html_content),
+                )
+                logger.info("转换后纯文本长度: %d", len(plain_text))
                 
                 # 验证文本内容
                 is_valid, error_message = validate_text_for_ai(plain_text)
                 if not is_valid:
-                    logger.warning(f"文本验证失败: {error_message}")
+                    logger.warning("文本验证失败: %s", error_message)
                     validation_error = {
                         "type": "validation_error",
                         "message": error_message,
-                        "timestamp": datetime.utcnow().isoformat()
+                        "timestamp": timestamp
                     }
-                    await websocket.send_text(json.dumps(validation_error))
+                    await _send(websocket, validation_error)
                     continue
                 
                 # 使用增强版AI分析（支持Function Calling）
                 logger.info("开始增强版AI文档分析...")
-                response_chunks = []
                 
-                async for chunk in ai.review_document_with_functions(plain_text):
-                    if chunk:
-                        response_chunks.append(chunk)
-                
-                # 合并所有响应
-                full_response = "".join(response_chunks)
-                
-                try:
-                    # 解析JSON响应
-                    parsed_result = json.loads(full_response)
-                    
-                    # 发送完整的建议结果
+                batcher = get_review_batcher()
+                if batcher is not None and batcher.accepts(plain_text):
+                    # 批量模式：与其他连接的短文档合并为一次请求，整批完成后一次性返回
+                    body, issue_count = await batcher.submit(plain_text)
                     success_response = {
                         "type": "ai_suggestions",
-                        "data": parsed_result,
-                        "timestamp": datetime.utcnow().isoformat()
-                    }
-                    await websocket.send_text(json.dumps(success_response))
-                    logger.info(f"Enhanced AI分析完成，发现 {len(parsed_result.get('issues', []))} 个问题")
-                    
-                except json.JSONDecodeError as e:
-                    logger.error(f"JSON解析失败: {e}")
-                    error_response = {
-                        "type": "parsing_error",
-                        "message": "AI响应解析失败",
-                        "timestamp": datetime.utcnow().isoformat()
+                        "data": orjson.Fragment(body),
+                        "timestamp": timestamp
                     }
-                    await websocket.send_text(json.dumps(error_response))
+                    await _send(websocket, success_response)
+                    logger.info("Enhanced AI批量分析完成，发现 %d 个问题", issue_count)
+                    continue
+                
+                # 每条建议解析完成后立即推送，最后再发送完整的建议结果
+                async for event in ai.review_document_with_functions(plain_text):
+                    if event["type"] == "issue":
+                        partial_response = {
+                            "type": "ai_suggestion_partial",
+                            "data": event["data"],
+                            "timestamp": timestamp
+                        }
+                        await _send(websocket, partial_response)
+                    elif event["type"] == "complete":
+                        # body已是序列化好的JSON，用Fragment原样嵌入，不再重新编码
+                        success_response = {
+                            "type": "ai_suggestions",
+                            "data": orjson.Fragment(event["body"]),
+                            "timestamp": timestamp
+                        }
+                        await _send(websocket, success_response)
+                        logger.info("Enhanced AI分析完成，发现 %d 个问题", event["issue_count"])
                     
             except Exception as e:
-                logger.error(f"处理分析时出错: {e}")
+                logger.error("处理分析时出错: %s", e)
                 error_response = {
                     "type": "ai_error",
                     "message": f"AI分析失败: {str(e)}",
-                    "timestamp": datetime.utcnow().isoformat()
+                    "timestamp": timestamp
                 }
-                await websocket.send_text(json.dumps(error_response))
+                await _send(websocket, error_response)
                 
     except WebSocketDisconnect:
         logger.info("Enhanced WebSocket连接已断开")
     except Exception as e:
-        logger.error(f"Enhanced WebSocket处理错误: {e}")
+        logger.error("Enhanced WebSocket处理错误: %s", e)
         try:
             error_response = {
                 "type": "server_error",
                 "message": f"服务器内部错误: {str(e)}"
             }
-            await websocket.send_text(json.dumps(error_response))
+            await _send(websocket, error_response)
         except:
             pass
 
 
-async def chat_with_ai(request: ChatRequest):
+async def chat_with_ai(request: ChatRequest) -> StreamingResponse:
     """
     AI聊天功能端点
     
@@ -152,23 +171,31 @@ async def chat_with_ai(request: ChatRequest):
     - 提问专利相关问题
     - 请求生成图表
     - 获取专利撰写建议
+    
+    以Server-Sent Events流式返回，AI每生成一段内容就立即推送：
+    - event: message  data: JSON字符串（文本片段）
+    - event: diagram  data: JSON字符串（mermaid代码块）
+    - event: error    data: JSON字符串（错误信息）
+    - event: done     data: null
     """
     try:
         ai = get_ai_enhanced()
-        
-        # 构建消息历史
-        messages = [{"role": msg.role, "content": msg.content} for msg in request.messages]
-        
-        # 获取AI响应
-        response_chunks = []
-        async for chunk in ai.chat_with_user(messages):
-            if chunk:
-                response_chunks.append(chunk)
-        
-        full_response = "".join(response_chunks)
-        
-        return {"response": full_response}
-        
-    except Exception as e:
-        logger.error(f"聊天处理错误: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+    except ValueError as e:
+        logger.error("聊天处理错误: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    # 构建消息历史（model_dump得到 [{"role": ..., "content": ...}, ...]）
+    messages = request.model_dump()["messages"]
+    
+    async def event_stream() -> AsyncGenerator[bytes, None]:
+        try:
+            async for event, content in ai.chat_with_user(messages):
+                yield b"event: " + event.encode() + b"\ndata: " + orjson.dumps(content) + b"\n\n"
+        except Exception as e:
+            # 响应头已发送，只能通过error事件通知前端
+            logger.error("聊天处理错误: %s", e)
+            yield b"event: error\ndata: " + orjson.dumps(str(e)) + b"\n\n"
+            return
+        yield b"event: done\ndata: null\n\n"
+    
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
@@ -1,15 +1,28 @@
 from __future__ import annotations
 
+import asyncio
+from collections import OrderedDict
+from functools import lru_cache
+import hashlib
 import os
-import json
 from typing import AsyncGenerator, Dict, Any, List
 
 from dotenv import load_dotenv
-from openai import AsyncOpenAI
+import httpx
+from openai import AsyncOpenAI, AsyncStream
+from openai.types.chat import ChatCompletionChunk
+import orjson
 
 import logging
 
-from app.internal.prompt_enhanced import ENHANCED_PROMPT, FUNCTION_TOOLS
+from app.internal.prompt_enhanced import (
+    BATCH_FUNCTION_TOOLS,
+    BATCH_PROMPT,
+    CHAT_TOOLS,
+    ENHANCED_PROMPT,
+    PROMPT_FINGERPRINT,
+    REVIEW_TOOLS,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -18,22 +31,235 @@ load_dotenv(override=True)  # 强制覆盖环境变量
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 OPENAI_MODEL = os.getenv("OPENAI_MODEL") or "gpt-4o"
 
+# 批量审查开关：开启后，短时间内多个连接提交的短文档会合并为一次OpenAI请求
+ENABLE_REVIEW_BATCHING = os.getenv("ENABLE_REVIEW_BATCHING", "").lower() in ("1", "true", "yes")
+REVIEW_BATCH_MAX_SIZE = 4  # 每批最多合并的文档数
+REVIEW_BATCH_MAX_WAIT_MS = 50  # 凑批最多等待的时间
+REVIEW_BATCH_MAX_DOCUMENT_LENGTH = 2000  # 超过该长度的文档单独审查
 
+# 审查结果缓存容量：用户点击"重新分析"或文档未改动时直接返回上次结果
+REVIEW_CACHE_SIZE = 128
+
+# 严重度排序，用于合并多个issues时选出最高严重度
+SEVERITY_ORDER = {"high": 3, "medium": 2, "low": 1}
+
+
+def _severity_rank(severity: str) -> int:
+    return SEVERITY_ORDER.get(severity, 2)
+
+
+@lru_cache(maxsize=1)
 def get_ai_enhanced(
     model: str | None = OPENAI_MODEL,
     api_key: str | None = OPENAI_API_KEY,
 ) -> AIEnhanced:
+    # 所有请求共用同一个实例（以及同一个连接池），避免每次都重新建立TCP/TLS连接
     if not api_key or not model:
         raise ValueError("Both API key and model need to be set")
     return AIEnhanced(api_key, model)
 
 
+@lru_cache(maxsize=1)
+def get_review_batcher() -> ReviewBatcher | None:
+    """返回全局共用的ReviewBatcher；未开启ENABLE_REVIEW_BATCHING时返回None"""
+    if not ENABLE_REVIEW_BATCHING:
+        return None
+    return ReviewBatcher(get_ai_enhanced())
+
+
+def _build_issue(args: Dict[str, Any]) -> Dict[str, Any] | None:
+    """
+    将create_suggestion的arguments转换为前端使用的建议格式
+    
+    一个文本段可能有多个issues，合并为一条建议（最高严重度、合并类型和描述）
+    """
+    # 处理新格式：一个文本段可能有多个issues
+    text_issues = args.get("issues", [])
+    
+    # 如果是旧格式（向后兼容）
+    if not text_issues and args.get("type"):
+        text_issues = [{
+            "type": args.get("type", ""),
+            "severity": args.get("severity", "medium"),
+            "description": args.get("description", "")
+        }]
+    
+    if not text_issues:
+        return None
+    
+    # 合并所有issues的类型和描述（一次遍历同时收集三个字段）
+    types, descriptions, severities = [], [], []
+    for text_issue in text_issues:
+        types.append(text_issue.get("type", ""))
+        descriptions.append(text_issue.get("description", ""))
+        severities.append(text_issue.get("severity", "medium"))
+    
+    # 选择最高严重度（未知的严重度按medium处理）
+    max_severity = max(severities, key=_severity_rank)
+    
+    # 创建单一建议
+    return {
+        "type": " & ".join(types),  # 合并所有issue类型
+        "severity": max_severity,
+        "paragraph": args.get("paragraph", 1),
+        "description": " | ".join(descriptions),  # 合并所有描述
+        "text": args.get("originalText", ""),  # 映射字段
+        "suggestion": args.get("replaceTo", ""),  # 映射字段
+        "originalText": args.get("originalText", ""),
+        "replaceTo": args.get("replaceTo", ""),
+        "issues": text_issues  # 保留详细的issues数组供UI使用
+    }
+
+
+def _is_new_suggestion(issue: Dict[str, Any], seen: set[tuple[str, str]]) -> bool:
+    """
+    判断建议是否第一次出现，并记录到seen中
+    
+    模型偶尔会对同一段文本重复调用create_suggestion，完全相同的建议只保留第一条，
+    避免前端出现重复卡片、接受其中一条后另一条无法匹配
+    """
+    key = (issue["originalText"], issue["replaceTo"])
+    if key in seen:
+        logger.info("🔁 忽略重复建议: %s", issue["originalText"])
+        return False
+    seen.add(key)
+    return True
+
+
+class _ArgumentBuffer:
+    """
+    增量累积单个tool call的arguments
+    
+    为什么不直接用字符串拼接？
+    - 流式delta很多时，str的+=会反复复制，整体是O(N²)
+    - 这里用bytearray追加，并在追加时顺带维护花括号深度（忽略字符串内的括号），
+      每个字节只扫描一次，顶层JSON对象闭合时才用orjson解析一次
+    """
+    __slots__ = ("name", "_buffer", "_depth", "_started", "_in_string", "_escape")
+    
+    def __init__(self, name: str):
+        self.name = name
+        self._buffer = bytearray()
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+    
+    def feed(self, fragment: str) -> bool:
+        """追加一段arguments，返回顶层JSON对象是否已经完整"""
+        data = fragment.encode()
+        self._buffer.extend(data)
+        for byte in data:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif byte == 0x5C:  # 反斜杠
+                    self._escape = True
+                elif byte == 0x22:  # 双引号
+                    self._in_string = False
+            elif byte == 0x22:
+                self._in_string = True
+            elif byte == 0x7B:  # {
+                self._depth += 1
+                self._started = True
+            elif byte == 0x7D:  # }
+                self._depth -= 1
+        return self._started and self._depth == 0
+    
+    def parse(self) -> Dict[str, Any]:
+        return orjson.loads(self._buffer)
+    
+    def __str__(self) -> str:
+        return self._buffer.decode(errors="replace")
+
+
+async def _iter_stream(stream: AsyncStream[ChatCompletionChunk]) -> AsyncGenerator[str | _ArgumentBuffer, None]:
+    """
+    逐块处理OpenAI的流式响应，供审查和聊天共用
+    
+    - 普通文本内容按到达顺序原样yield（str）
+    - tool call按index累积arguments，顶层JSON对象闭合后立即yield完整的_ArgumentBuffer
+    - 未闭合就被替换、或到流结束仍未闭合的function call也会yield，它的parse()会抛出
+      JSONDecodeError，调用方据此知道结果不完整（例如不写入缓存）
+    """
+    current_function_calls: Dict[int, _ArgumentBuffer] = {}  # 只保存尚未完整的function calls
+    chunk_count = 0
+    tool_call_delta_count = 0
+    
+    async for chunk in stream:
+        chunk_count += 1
+        delta = chunk.choices[0].delta
+        
+        if delta.content:
+            yield delta.content
+        
+        # 处理tool calls（逐块日志开销大，只在循环结束后汇总记录）
+        if not delta.tool_calls:
+            continue
+        tool_call_delta_count += len(delta.tool_calls)
+        for tool_call in delta.tool_calls:
+            call_index = tool_call.index
+            
+            if tool_call.function.name:
+                # 新的function call开始
+                if call_index in current_function_calls:
+                    # 之前这个index的arguments一直没能闭合，交给调用方按解析失败处理
+                    logger.warning("⚠️ Function call %d 未完成即被替换", call_index)
+                    yield current_function_calls[call_index]
+                current_function_calls[call_index] = _ArgumentBuffer(tool_call.function.name)
+                logger.info("🆕 新的function call %d: %s", call_index, tool_call.function.name)
+            elif call_index not in current_function_calls:
+                continue
+            
+            # 继续累积这个index的arguments，顶层对象闭合说明这个function call已完整
+            func_call = current_function_calls[call_index]
+            if func_call.feed(tool_call.function.arguments or ""):
+                del current_function_calls[call_index]
+                yield func_call
+    
+    # 流结束时仍未闭合的function calls说明arguments不完整
+    if current_function_calls:
+        logger.error("❌ %d 个function call的arguments不完整", len(current_function_calls))
+        for func_call in current_function_calls.values():
+            yield func_call
+    logger.info("🔄 AI流式响应结束：共 %d 个流式块，%d 个tool call增量", chunk_count, tool_call_delta_count)
+
+
 class AIEnhanced:
     def __init__(self, api_key: str, model: str):
         self.model = model
-        self._client = AsyncOpenAI(api_key=api_key)
+        # HTTP/2在同一条TCP连接上复用并发的流式请求；超时与openai SDK默认值保持一致
+        http_client = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+            timeout=httpx.Timeout(600.0, connect=5.0),
+            follow_redirects=True,
+        )
+        self._client = AsyncOpenAI(api_key=api_key, http_client=http_client)
+        # 审查结果缓存（LRU）：(提示词指纹, 模型, 文档) 摘要 -> (序列化后的{"issues": [...]}, 建议数量)
+        self._review_cache: OrderedDict[bytes, tuple[bytes, int]] = OrderedDict()
+
+    def _review_cache_key(self, document: str) -> bytes:
+        # 提示词/工具定义指纹也参与键计算，提示词改动后旧结果自动失效
+        return hashlib.sha256(f"{PROMPT_FINGERPRINT}\0{self.model}\0{document}".encode()).digest()
+
+    def _get_cached_review(self, document: str) -> tuple[bytes, int] | None:
+        key = self._review_cache_key(document)
+        cached = self._review_cache.get(key)
+        if cached is not None:
+            self._review_cache.move_to_end(key)
+        return cached
 
-    async def review_document_with_functions(self, document: str) -> AsyncGenerator[str | None, None]:
+    def _cache_review(self, document: str, body: bytes, issue_count: int) -> None:
+        self._review_cache[self._review_cache_key(document)] = (body, issue_count)
+        if len(self._review_cache) > REVIEW_CACHE_SIZE:
+            self._review_cache.popitem(last=False)
+
+    def clear_review_cache(self) -> None:
+        """清空审查结果缓存（例如修改提示词后，或测试中）"""
+        self._review_cache.clear()
+
+    async def review_document_with_functions(self, document: str) -> AsyncGenerator[Dict[str, Any], None]:
         """
         Review patent document using Function Calling for more precise suggestions.
         
@@ -41,10 +267,20 @@ class AIEnhanced:
         document -- Patent document to review
         
         Response:
-        Yields JSON with suggestions including originalText and replaceTo fields
+        Yields an event {"type": "issue", "data": {...}} as soon as each
+        create_suggestion call finishes streaming, then a final
+        {"type": "complete", "body": <orjson bytes of {"issues": [...]}>, "issue_count": N}
         """
-        logger.info(f"📄 开始增强版AI分析，文档长度: {len(document)}")
-        logger.info(f"📄 文档内容预览: {document[:200]}...")
+        logger.info("📄 开始增强版AI分析，文档长度: %d", len(document))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📄 文档内容预览: %s...", document[:200])
+        
+        # 相同文档直接返回缓存结果，跳过整个OpenAI调用
+        cached = self._get_cached_review(document)
+        if cached is not None:
+            logger.info("♻️ 命中审查缓存，%d 个建议", cached[1])
+            yield {"type": "complete", "body": cached[0], "issue_count": cached[1]}
+            return
         
         # 使用Function Calling进行分析
         stream = await self._client.chat.completions.create(
@@ -54,112 +290,111 @@ class AIEnhanced:
                 {"role": "system", "content": ENHANCED_PROMPT},
                 {"role": "user", "content": document},
             ],
-            tools=FUNCTION_TOOLS,
+            tools=REVIEW_TOOLS,
             tool_choice="auto",  # 让AI自动决定调用多少次函数，而不是强制单次调用
             stream=True,
         )
 
-        # 收集function calls
-        function_calls = []
-        current_function_calls = {}  # 用字典跟踪多个并行的function calls
+        issues = []
+        seen_suggestions = set()  # (originalText, replaceTo)，过滤模型重复调用产生的相同建议
+        incomplete = False  # 有function call解析失败或未完整时，结果不写入缓存
+        debug_enabled = logger.isEnabledFor(logging.DEBUG)
         
         logger.info("🔄 开始处理AI流式响应...")
         
-        async for chunk in stream:
-            delta = chunk.choices[0].delta
-            
+        async for item in _iter_stream(stream):
             # 记录普通文本内容（用于调试）
-            if delta.content:
-                logger.debug(f"📝 AI文本响应: {delta.content}")
+            if isinstance(item, str):
+                if debug_enabled:
+                    logger.debug("📝 AI文本响应: %s", item)
+                continue
             
-            # 处理tool calls
-            if delta.tool_calls:
-                logger.info(f"🔧 收到tool call: {delta.tool_calls}")
-                for tool_call in delta.tool_calls:
-                    call_index = tool_call.index
-                    
-                    if tool_call.function.name:
-                        # 新的function call开始
-                        if call_index in current_function_calls:
-                            # 如果这个index已经有function call，先保存之前的
-                            function_calls.append(current_function_calls[call_index])
-                        
-                        current_function_calls[call_index] = {
-                            "name": tool_call.function.name,
-                            "arguments": tool_call.function.arguments or ""
-                        }
-                        logger.info(f"🆕 新的function call {call_index}: {tool_call.function.name}")
-                        
-                    elif call_index in current_function_calls:
-                        # 继续累积这个index的arguments
-                        current_function_calls[call_index]["arguments"] += tool_call.function.arguments or ""
-        
-        # 添加所有剩余的function calls
-        for call_index, func_call in current_function_calls.items():
-            function_calls.append(func_call)
-        
-        logger.info(f"📊 收集到 {len(function_calls)} 个function calls")
-        for i, call in enumerate(function_calls):
-            logger.info(f"🔧 Function call {i+1}: {call['name']}")
-            logger.debug(f"🔧 Arguments: {call['arguments'][:200]}...")
-        
-        # 处理并生成响应
-        issues = []
-        for func_call in function_calls:
-            if func_call["name"] == "create_suggestion":
-                try:
-                    args = json.loads(func_call["arguments"])
-                    logger.info(f"✅ 解析function arguments成功: {args}")
-                    
-                    # 处理新格式：一个文本段可能有多个issues
-                    text_issues = args.get("issues", [])
-                    
-                    # 如果是旧格式（向后兼容）
-                    if not text_issues and args.get("type"):
-                        text_issues = [{
-                            "type": args.get("type", ""),
-                            "severity": args.get("severity", "medium"),
-                            "description": args.get("description", "")
-                        }]
-                    
-                    # 创建一个单一的建议条目，包含所有issues
-                    if text_issues:
-                        # 合并所有issues的类型和描述
-                        types = [issue.get("type", "") for issue in text_issues]
-                        descriptions = [issue.get("description", "") for issue in text_issues]
-                        severities = [issue.get("severity", "medium") for issue in text_issues]
-                        
-                        # 选择最高严重度
-                        severity_order = {"high": 3, "medium": 2, "low": 1}
-                        max_severity = max(severities, key=lambda x: severity_order.get(x, 2))
-                        
-                        # 创建单一建议
-                        issue = {
-                            "type": " & ".join(types),  # 合并所有issue类型
-                            "severity": max_severity,
-                            "paragraph": args.get("paragraph", 1),
-                            "description": " | ".join(descriptions),  # 合并所有描述
-                            "text": args.get("originalText", ""),  # 映射字段
-                            "suggestion": args.get("replaceTo", ""),  # 映射字段
-                            "originalText": args.get("originalText", ""),
-                            "replaceTo": args.get("replaceTo", ""),
-                            "issues": text_issues  # 保留详细的issues数组供UI使用
-                        }
-                        issues.append(issue)
-                        logger.info(f"📝 添加建议: {issue['type']} - 包含 {len(text_issues)} 个问题")
-                except json.JSONDecodeError as e:
-                    logger.error(f"❌ JSON解析失败: {e}")
-                    logger.error(f"❌ 原始arguments: {func_call['arguments']}")
-                    continue
+            if item.name != "create_suggestion":
+                continue
+            try:
+                args = item.parse()
+            except orjson.JSONDecodeError as e:
+                logger.error("❌ JSON解析失败: %s", e)
+                logger.error("❌ 原始arguments: %s", item)
+                incomplete = True
+                continue
+            if debug_enabled:
+                logger.debug("✅ 解析function arguments成功: %r", args)
+            
+            issue = _build_issue(args)
+            if issue and _is_new_suggestion(issue, seen_suggestions):
+                issues.append(issue)
+                logger.info("📝 添加建议: %s - 包含 %d 个问题", issue["type"], len(issue["issues"]))
+                # 立即推送这条建议，前端无需等待整个流结束
+                yield {"type": "issue", "data": issue}
         
-        logger.info(f"✨ 最终生成 {len(issues)} 个建议")
+        logger.info("✨ 最终生成 %d 个建议", len(issues))
         
-        # 生成JSON响应
-        response = json.dumps({"issues": issues}, ensure_ascii=False)
-        logger.info(f"📤 返回响应: {response[:200]}...")
-        yield response
+        # 在这里一次性序列化为可直接发送的bytes，并附带建议数量，
+        # 调用方无需再遍历或持有issues列表
+        body = orjson.dumps({"issues": issues})
+        # 只缓存完整的结果，否则用户重新分析时会一直拿到这次残缺的结果
+        if incomplete:
+            logger.warning("⚠️ 部分建议解析失败，本次结果不写入缓存")
+        else:
+            self._cache_review(document, body, len(issues))
+        yield {"type": "complete", "body": body, "issue_count": len(issues)}
 
-    async def chat_with_user(self, messages: List[Dict[str, str]]) -> AsyncGenerator[str | None, None]:
+    async def review_batch(self, documents: List[str]) -> tuple[List[Dict[str, Any]], bool]:
+        """
+        Review several documents with a single OpenAI request.
+        
+        Arguments:
+        documents -- Patent documents to review
+        
+        Response:
+        A tuple of (a list of {"issues": [...]} dicts, one per input document, in the same order;
+        whether every tool call could be parsed and routed to its document)
+        """
+        logger.info("📦 批量审查 %d 篇文档", len(documents))
+        user_content = "\n\n".join(
+            f'<document id="{document_id}">\n{document}\n</document>'
+            for document_id, document in enumerate(documents)
+        )
+        
+        # 结果在整批完成后才分发，无需流式处理
+        response = await self._client.chat.completions.create(
+            model=self.model,
+            temperature=0.1,
+            messages=[
+                {"role": "system", "content": BATCH_PROMPT},
+                {"role": "user", "content": user_content},
+            ],
+            tools=BATCH_FUNCTION_TOOLS,
+            tool_choice="auto",
+        )
+        
+        results = [{"issues": []} for _ in documents]
+        seen_suggestions = [set() for _ in documents]
+        # 解析失败或documentId无效的建议无法确定属于哪篇文档，整批结果都视为不完整
+        complete = True
+        for tool_call in response.choices[0].message.tool_calls or []:
+            if tool_call.function.name != "create_suggestion":
+                continue
+            try:
+                args = orjson.loads(tool_call.function.arguments)
+            except orjson.JSONDecodeError as e:
+                logger.error("❌ JSON解析失败: %s", e)
+                complete = False
+                continue
+            
+            document_id = args.get("documentId")
+            if not isinstance(document_id, int) or not 0 <= document_id < len(documents):
+                logger.warning("⚠️ 无效的documentId: %r", document_id)
+                complete = False
+                continue
+            issue = _build_issue(args)
+            if issue and _is_new_suggestion(issue, seen_suggestions[document_id]):
+                results[document_id]["issues"].append(issue)
+        
+        return results, complete
+
+    async def chat_with_user(self, messages: List[Dict[str, str]]) -> AsyncGenerator[tuple[str, str], None]:
         """
         聊天功能，支持Function Calling
         
@@ -167,35 +402,118 @@ class AIEnhanced:
         messages -- 聊天历史消息列表
         
         Response:
-        流式返回AI响应
+        流式返回 (事件类型, 内容)：
+        - ("message", 文本片段)
+        - ("diagram", mermaid代码块)
         """
         stream = await self._client.chat.completions.create(
             model=self.model,
             temperature=0.2,  # 聊天时稍高一点的温度，保持一定创造性
             messages=messages,
-            tools=FUNCTION_TOOLS,
+            tools=CHAT_TOOLS,
             tool_choice="auto",
             stream=True,
         )
 
-        async for chunk in stream:
-            delta = chunk.choices[0].delta
-            
+        async for item in _iter_stream(stream):
             # 处理普通文本响应
-            if delta.content:
-                yield delta.content
-            
-            # 处理工具调用
-            if delta.tool_calls:
-                for tool_call in delta.tool_calls:
-                    if tool_call.function.name == "create_diagram":
-                        # 处理图表生成
-                        try:
-                            args = json.loads(tool_call.function.arguments)
-                            diagram_response = {
-                                "type": "diagram",
-                                "data": args
-                            }
-                            yield f"\n```mermaid\n{args.get('mermaid_syntax', '')}\n```\n"
-                        except json.JSONDecodeError:
-                            continue
\ No newline at end of file
+            if isinstance(item, str):
+                yield "message", item
+            elif item.name == "create_diagram":
+                # 处理图表生成
+                try:
+                    args = item.parse()
+                except orjson.JSONDecodeError:
+                    continue
+                yield "diagram", f"\n```mermaid\n{args.get('mermaid_syntax', '')}\n```\n"
+
+
+class ReviewBatcher:
+    """
+    将短时间内多个连接提交的短文档合并为一次OpenAI请求
+    
+    工作方式：
+    - submit() 把 (文档, future) 放入队列并等待结果
+    - 后台协程取出第一篇文档后，最多再等待 REVIEW_BATCH_MAX_WAIT_MS 毫秒
+      或凑满 REVIEW_BATCH_MAX_SIZE 篇，然后发出一次请求，并通过future把结果分发回去
+    """
+    
+    def __init__(
+        self,
+        ai: AIEnhanced,
+        max_batch_size: int = REVIEW_BATCH_MAX_SIZE,
+        max_wait_ms: int = REVIEW_BATCH_MAX_WAIT_MS,
+        max_document_length: int = REVIEW_BATCH_MAX_DOCUMENT_LENGTH,
+    ):
+        self._ai = ai
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait_ms / 1000
+        self._max_document_length = max_document_length
+        self._queue: asyncio.Queue | None = None
+        self._worker: asyncio.Task | None = None
+        self._dispatching: set[asyncio.Task] = set()  # 保留任务引用，防止执行中被垃圾回收
+    
+    def accepts(self, document: str) -> bool:
+        """只有短文档才参与批量审查，长文档单独审查以免拖慢整批"""
+        return len(document) <= self._max_document_length
+    
+    async def submit(self, document: str) -> tuple[bytes, int]:
+        """提交一篇文档，返回 (序列化后的{"issues": [...]}, 建议数量)"""
+        cached = self._ai._get_cached_review(document)
+        if cached is not None:
+            return cached
+        
+        if self._worker is None or self._worker.done():
+            self._queue = asyncio.Queue()
+            self._worker = asyncio.create_task(self._collect_batches())
+        
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((document, future))
+        return await future
+    
+    async def _collect_batches(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self._max_wait
+            while len(batch) < self._max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            # 不等待这一批完成，立即开始收集下一批
+            task = asyncio.create_task(self._dispatch(batch))
+            self._dispatching.add(task)
+            task.add_done_callback(self._dispatching.discard)
+    
+    async def _dispatch(self, batch: List[tuple[str, asyncio.Future]]) -> None:
+        try:
+            if len(batch) == 1:
+                # 只有一篇时走普通的单文档审查，提示词与未开启批量时完全一致
+                results = [
+                    (event["body"], event["issue_count"])
+                    async for event in self._ai.review_document_with_functions(batch[0][0])
+                    if event["type"] == "complete"
+                ]
+            else:
+                documents = [document for document, _ in batch]
+                batch_results, complete = await self._ai.review_batch(documents)
+                results = [(orjson.dumps(result), len(result["issues"])) for result in batch_results]
+                # 只缓存完整的结果
+                if complete:
+                    for document, (body, issue_count) in zip(documents, results):
+                        self._ai._cache_review(document, body, issue_count)
+                else:
+                    logger.warning("⚠️ 批量审查有建议无法解析或归属，本批结果不写入缓存")
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
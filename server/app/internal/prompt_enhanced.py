@@ -1,6 +1,18 @@
 # Enhanced prompt with Function Calling support
 
-RULES = {
+import copy
+import hashlib
+import os
+import re
+import sys
+
+from dotenv import load_dotenv
+import orjson
+
+load_dotenv(override=True)  # USE_VERBOSE_RULES may be set in .env
+
+# Original long-form rule descriptions, kept for A/B comparison against the compact set
+RULES_VERBOSE = {
     "Structure": """
     A patent claim is traditionally written as a single sentence in present tense. Each claim begins with a capital letter and ends with a period. Periods may not be used elsewhere in the claims (other than abbreviations). Semicolons are usually used to separate clauses and phrases. A patent claim is typically broken into three parts: a preamble, a transitional phrase, and a body. 
 
@@ -68,12 +80,76 @@ RULES = {
         """,
 }
 
-RULES_TEXT = "\n".join(
-    [f"{name}: {description}\n" for name, description in RULES.items()]
-)
+# One-sentence definition plus one passing and one failing example per rule.
+# Same rules as RULES_VERBOSE at a fraction of the prompt tokens.
+RULES_COMPACT = {
+    "Structure": """
+        A claim is a single present-tense sentence made of a preamble, a transitional phrase and a body, starting with a capital letter and using its only period at the end; prefer open transitions ("comprising", "containing", "characterized by") over closed ones ("consisting of").
+        Pass: An apparatus, comprising: a pencil; and an eraser attached to the pencil.
+        Fail: An apparatus consisting of a pencil. The pencil has an eraser.
+    """,
+    "Punctuation": """
+        A comma follows the preamble, a colon follows the transitional phrase, elements are separated by semicolons, the penultimate element ends with "; and" and the last element ends with a period.
+        Pass: An apparatus, comprising: a plurality of printed pages; a binding configured to hold the printed pages together; and a cover attached to the binding.
+        Fail: An apparatus comprising a plurality of printed pages, a binding configured to hold the printed pages together, a cover attached to the binding
+    """,
+    "Antecedent Basis": """
+        Each element is introduced with "a" or "an" on first use and referred back to with "the", never with "the" before it has been introduced.
+        Pass: A device, comprising: a pencil; and a light attached to the pencil.
+        Fail: A device, comprising: the pencil; and a light attached to a pencil.
+    """,
+    "Ambiguity and Indefinite Issues": """
+        Claims must define their scope distinctly, without subjective or relative terms such as "long", "effective", "bright" or "near".
+        Pass: a light attached to a center of the pencil
+        Fail: a long pencil having two ends; a bright light attached near a center of the pencil
+    """,
+    "Broadening Dependent Claims": """
+        A dependent claim must further narrow the claim it depends from and must never contradict, broaden or fail to limit it.
+        Pass: 1. A device, comprising: a pencil; and a light attached to the pencil. 2. The device of claim 1, wherein the light is detachably attached to the pencil.
+        Fail: 1. A device, comprising: a pencil; and a light detachably attached to the pencil. 2. The device of claim 1, wherein the light is permanently attached to the pencil.
+    """,
+}
+
+# USE_VERBOSE_RULES=true switches the prompt back to the long-form rules
+USE_VERBOSE_RULES = os.getenv("USE_VERBOSE_RULES", "").lower() in ("1", "true", "yes")
+
+
+def _compact(text: str) -> str:
+    """
+    Strip per-line indentation and collapse whitespace runs and blank lines.
+    The prompt is sent on every request, and indentation is tokenized and billed like any other text.
+    """
+    text = "\n".join(line.strip() for line in text.strip().splitlines())
+    text = re.sub(r"[ \t]+", " ", text)
+    return re.sub(r"\n{2,}", "\n", text)
+
+
+def _tuplify(obj):
+    """
+    Recursively turn lists into tuples. Only the lists become immutable: dicts stay plain mutable
+    dicts, because the OpenAI SDK serializes tool parameters with the stdlib json encoder,
+    which rejects MappingProxyType.
+    """
+    if isinstance(obj, dict):
+        return {key: _tuplify(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return tuple(_tuplify(item) for item in obj)
+    return obj
+
 
-# Enhanced prompt for Function Calling
-ENHANCED_PROMPT = f"""
+# Cleaned once at import, so the cost is paid zero times per request
+RULES_VERBOSE = {name: _compact(description) for name, description in RULES_VERBOSE.items()}
+RULES_COMPACT = {name: _compact(description) for name, description in RULES_COMPACT.items()}
+RULES = RULES_VERBOSE if USE_VERBOSE_RULES else RULES_COMPACT
+
+
+def _build_prompt(rules: dict[str, str]) -> str:
+    """
+    Render the Function Calling review prompt for the given rule set.
+    The rules are formatted straight into the single prompt render; _compact folds the separators.
+    """
+    rules_text = "\n".join(f"{name}: {description}" for name, description in rules.items())
+    return _compact(f"""
 Your job is to review the "Claims" section of a patent document. You must comment on its strength, and decide whether it passes a set of rules. 
 If it does not pass a given rule, suggest a change that would make it pass.
 
@@ -90,7 +166,7 @@ An apparatus, comprising:
 - an eraser attached to one end of the pencil; and
 - a light attached to the center of the pencil.
 
-Here are the rules you should check for: {RULES_TEXT}
+Here are the rules you should check for: {rules_text}
 
 IMPORTANT: You must thoroughly review the entire document and identify ALL issues you find. For EACH piece of text that has issues, call the create_suggestion function ONCE, providing:
 1. The exact original text (originalText)
@@ -100,8 +176,12 @@ IMPORTANT: You must thoroughly review the entire document and identify ALL issue
 For example, if "a eraser" has both antecedent basis issues (should be "an") and ambiguity issues (too vague), provide ONE correction like "an effective eraser" that addresses BOTH problems. This prevents conflicts when users accept suggestions.
 
 When you find issues, use the create_suggestion function to report them.
-For diagrams or flowcharts requested by the user, use the create_diagram function.
-"""
+""")
+
+
+# Enhanced prompt for Function Calling. Interned so every request and worker thread
+# references the same string object.
+ENHANCED_PROMPT = sys.intern(_build_prompt(RULES))
 
 # Function tools definition for OpenAI
 FUNCTION_TOOLS = [
@@ -180,6 +260,69 @@ FUNCTION_TOOLS = [
         }
     }
 ]
+# Lists become tuples once at import. The dicts are still mutable: treat the tool schemas as
+# read-only, since FUNCTION_TOOLS_JSON and PROMPT_FINGERPRINT are computed from them below.
+FUNCTION_TOOLS = _tuplify(FUNCTION_TOOLS)
+
+# FUNCTION_TOOLS never changes after import, so encode it exactly once.
+# Use these bytes wherever the schema needs to be hashed or embedded in a hand-built JSON body.
+FUNCTION_TOOLS_JSON = orjson.dumps(FUNCTION_TOOLS)
+
+# Each flow only ships the tool it actually handles: review consumes create_suggestion,
+# chat consumes create_diagram. Smaller tools payload per request, fewer prompt tokens.
+_TOOLS_BY_NAME = {tool["function"]["name"]: tool for tool in FUNCTION_TOOLS}
+REVIEW_TOOLS = (_TOOLS_BY_NAME["create_suggestion"],)
+CHAT_TOOLS = (_TOOLS_BY_NAME["create_diagram"],)
+
+# Batch review: several short documents are reviewed in a single request
+BATCH_PROMPT = ENHANCED_PROMPT + """
+You will receive several independent documents in one message, each wrapped in <document id="N"> ... </document> tags.
+Review every document separately and never mix text between documents. Every create_suggestion call MUST include the documentId of the document its originalText comes from, and its paragraph number is counted within that document.
+"""
+
+# create_suggestion with an extra documentId so batched results can be routed back to their document
+_batch_suggestion_tool = copy.deepcopy(_TOOLS_BY_NAME["create_suggestion"])
+_batch_suggestion_tool["function"]["parameters"]["properties"]["documentId"] = {
+    "type": "integer",
+    "description": "The id attribute of the <document> tag that contains originalText"
+}
+_batch_suggestion_tool["function"]["parameters"]["required"] += ("documentId",)
+BATCH_FUNCTION_TOOLS = _tuplify([_batch_suggestion_tool])
 
 # For backward compatibility
-PROMPT = ENHANCED_PROMPT
\ No newline at end of file
+PROMPT = ENHANCED_PROMPT
+
+# Identifies this exact set of prompts + tool schemas. Callers put it in their response cache keys
+# so cached results are never served after the prompts or the schemas change. The batch variants
+# are included because batch review results share the same cache.
+PROMPT_FINGERPRINT = hashlib.blake2b(
+    b"\0".join((PROMPT.encode(), FUNCTION_TOOLS_JSON, BATCH_PROMPT.encode(), orjson.dumps(BATCH_FUNCTION_TOOLS))),
+    digest_size=16,
+).hexdigest()
+
+
+_PROMPT_TOKENS: tuple[int, ...] | None = None
+
+
+def prompt_tokens() -> tuple[int, ...] | None:
+    """
+    cl100k_base tokens of PROMPT, for context-window budgeting without re-running BPE per request.
+    Computed on first call rather than at import: tiktoken may download its BPE data, and importing
+    this module must not touch the network. Returns None when tiktoken (or its data) is unavailable;
+    only a successful encode is kept, so a failed download is retried on the next call.
+    """
+    global _PROMPT_TOKENS
+    if _PROMPT_TOKENS is None:
+        try:
+            import tiktoken
+
+            _PROMPT_TOKENS = tuple(tiktoken.get_encoding("cl100k_base").encode(PROMPT))
+        except (ImportError, OSError):  # requests' network errors are OSError subclasses
+            return None
+    return _PROMPT_TOKENS
+
+
+def prompt_token_count() -> int | None:
+    """Number of tokens in PROMPT, or None when tiktoken is unavailable."""
+    tokens = prompt_tokens()
+    return None if tokens is None else len(tokens)
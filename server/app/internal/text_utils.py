@@ -8,7 +8,12 @@
 - 需要保持文档的逻辑结构（段落、换行等）
 """
 
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
 from bs4 import BeautifulSoup
+import hashlib
 import re
 import logging
 import json
@@ -90,6 +95,75 @@ def html_to_plain_text(html_content: str) -> str:
         return re.sub(r'<[^>]+>', '', html_content).strip()
 
 
+# html_to_plain_text结果缓存：键为HTML的blake2b摘要，容量满时按FIFO淘汰最早的条目
+_PLAIN_TEXT_CACHE: Dict[bytes, str] = {}
+_PLAIN_TEXT_CACHE_SIZE = 64
+
+# 超过该大小的HTML交给进程池解析，彻底绕开GIL；较小的文档用线程池即可
+LARGE_HTML_THRESHOLD = 200 * 1024
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+
+def _get_process_pool() -> ProcessPoolExecutor:
+    """按需创建解析大文档用的进程池（整个进程共用一个）"""
+    global _process_pool
+    if _process_pool is None:
+        # 此时进程内已有线程池和HTTP客户端的线程，fork多线程进程可能死锁，改用forkserver启动子进程
+        _process_pool = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("forkserver"))
+    return _process_pool
+
+
+def shutdown_process_pool() -> None:
+    """关闭进程池，应用退出时调用"""
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(wait=False, cancel_futures=True)
+        _process_pool = None
+
+
+async def html_to_plain_text_async(html_content: str) -> str:
+    """
+    带缓存、不阻塞事件循环的html_to_plain_text
+    
+    为什么需要这个函数？
+    - 前端每次分析都会重新发送整篇文档，而文档在两次分析之间经常没有变化，
+      以内容摘要为键，未变化的文档直接命中内存，跳过BeautifulSoup解析
+    - BeautifulSoup解析是CPU密集型操作，直接在事件循环中执行会卡住同一worker上的所有WebSocket，
+      因此放到线程池执行；超大文档放到进程池执行
+    
+    Args:
+        html_content (str): 来自TipTap编辑器的HTML内容
+        
+    Returns:
+        str: 与html_to_plain_text相同的纯文本结果
+    """
+    global _process_pool
+    digest = hashlib.blake2b(html_content.encode(), digest_size=16).digest()
+    text = _PLAIN_TEXT_CACHE.get(digest)
+    if text is not None:
+        return text
+    
+    if len(html_content) > LARGE_HTML_THRESHOLD:
+        pool = _get_process_pool()
+        try:
+            text = await asyncio.get_running_loop().run_in_executor(pool, html_to_plain_text, html_content)
+        except BrokenProcessPool:
+            # 子进程异常退出（例如被OOM killer杀掉）后进程池无法再用：丢弃它，下次调用时重建，
+            # 本次改用线程池完成转换
+            logger.warning("⚠️ HTML解析进程池已损坏，重建进程池并改用线程池处理本次转换")
+            if _process_pool is pool:
+                _process_pool = None
+            pool.shutdown(wait=False, cancel_futures=True)
+            text = await asyncio.to_thread(html_to_plain_text, html_content)
+    else:
+        text = await asyncio.to_thread(html_to_plain_text, html_content)
+    
+    if len(_PLAIN_TEXT_CACHE) >= _PLAIN_TEXT_CACHE_SIZE:
+        _PLAIN_TEXT_CACHE.pop(next(iter(_PLAIN_TEXT_CACHE)), None)
+    _PLAIN_TEXT_CACHE[digest] = text
+    return text
+
+
 def validate_text_for_ai(text: str) -> tuple[bool, str]:
     """
     验证文本是否适合AI处理